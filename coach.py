@@ -21,12 +21,29 @@ Typical use from the UI:
     coach_textbox.set(text)
 """
 from __future__ import annotations
-import os, json, time
-from typing import Optional, Dict, Any
+import os, json, time, functools, itertools
+from collections import ChainMap
+from typing import Optional, Dict, Any, Tuple, Mapping, MutableMapping
 
 # ---------- Settings I/O -----------------------------------------------------
 DEFAULT_MODEL = "gpt-4o-mini"
 
+# orjson is optional: faster parse/dump when installed, stdlib json otherwise.
+try:
+    import orjson
+
+    def _loads(raw: bytes) -> Any:
+        return orjson.loads(raw)
+
+    def _dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:
+    def _loads(raw: bytes) -> Any:
+        return json.loads(raw)
+
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj, indent=2).encode("utf-8")
+
 def _settings_path(config_dir: str) -> str:
     return os.path.join(config_dir, "settings.json")
 
@@ -36,27 +53,43 @@ _DEF_SETTINGS = {
     "coach_enabled": False,
 }
 
-def load_settings(config_dir: str) -> Dict[str, Any]:
+# path -> (mtime_ns, parsed file contents); reparsed only when the file changes
+_SETTINGS_CACHE: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+
+def load_settings(config_dir: str) -> MutableMapping[str, Any]:
+    """Return settings layered over the defaults.
+
+    The result is a ChainMap with an empty front layer: reads fall through
+    to the file contents and then the defaults without copying, and writes
+    land in the front layer, so the cache and defaults are never mutated.
+    Use dict(...) on it if a plain dict is needed.
+    """
     os.makedirs(config_dir, exist_ok=True)
     path = _settings_path(config_dir)
     if not os.path.exists(path):
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(_DEF_SETTINGS, f, indent=2)
-        return dict(_DEF_SETTINGS)
+        with open(path, "wb") as f:
+            f.write(_dumps(_DEF_SETTINGS))
+        return ChainMap({}, _DEF_SETTINGS)
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        # merge defaults for any missing keys
-        merged = dict(_DEF_SETTINGS); merged.update(data or {})
-        return merged
+        mtime = os.stat(path).st_mtime_ns
+        cached = _SETTINGS_CACHE.get(path)
+        if cached is not None and cached[0] == mtime:
+            return ChainMap({}, cached[1], _DEF_SETTINGS)
+        with open(path, "rb") as f:
+            data = dict(_loads(f.read()) or {})
+        _SETTINGS_CACHE[path] = (mtime, data)
+        # defaults fill any missing keys
+        return ChainMap({}, data, _DEF_SETTINGS)
     except Exception:
-        return dict(_DEF_SETTINGS)
+        return ChainMap({}, _DEF_SETTINGS)
 
-def save_settings(config_dir: str, data: Dict[str, Any]) -> None:
+def save_settings(config_dir: str, data: Mapping[str, Any]) -> None:
     os.makedirs(config_dir, exist_ok=True)
-    merged = dict(_DEF_SETTINGS); merged.update(data or {})
-    with open(_settings_path(config_dir), "w", encoding="utf-8") as f:
-        json.dump(merged, f, indent=2)
+    merged = dict(ChainMap(dict(data or {}), _DEF_SETTINGS))
+    path = _settings_path(config_dir)
+    _SETTINGS_CACHE.pop(path, None)
+    with open(path, "wb") as f:
+        f.write(_dumps(merged))
 
 # ---------- Prompting --------------------------------------------------------
 _DEF_SYS = (
@@ -78,6 +111,19 @@ _DEF_USER_TEMPLATE = (
 )
 
 # ---------- OpenAI call (optional) ------------------------------------------
+# Clients keyed by API key, so repeated Coach clicks skip SDK import/setup.
+_CLIENT_CACHE: Dict[str, Any] = {}
+_CLIENT_CACHE_MAX = 4
+
+def _get_client(api_key: str) -> Any:
+    client = _CLIENT_CACHE.get(api_key)
+    if client is None:
+        from openai import OpenAI
+        client = OpenAI(api_key=api_key)
+        if len(_CLIENT_CACHE) >= _CLIENT_CACHE_MAX:
+            _CLIENT_CACHE.pop(next(iter(_CLIENT_CACHE)))  # drop oldest
+        _CLIENT_CACHE[api_key] = client
+    return client
 
 def _call_openai(api_key: str, model: str, system: str, user: str) -> Optional[str]:
     """Return text or None if the call cannot be made (no pkg, bad key, etc.)."""
@@ -85,8 +131,7 @@ def _call_openai(api_key: str, model: str, system: str, user: str) -> Optional[s
         return None
     try:
         # Try the official OpenAI Python client (>=1.0 style)
-        from openai import OpenAI
-        client = OpenAI(api_key=api_key)
+        client = _get_client(api_key)
         resp = client.responses.create(model=model or DEFAULT_MODEL,
                                        input=[{"role":"system","content":system},
                                               {"role":"user","content":user}],
@@ -115,32 +160,40 @@ def _local_advice(recent_summary: str, drill_cfg: Dict[str, Any], session_stats:
     corr = session_stats.get("early_corrections", 0)
     rel  = session_stats.get("avg_release_ms")
     release_goal = (drill_cfg or {}).get("release_goal", "MEDIUM")
-
-    tips = []
-    tips.append("• Breathe, then commit to first hit — no early dips.")
-    if ttb is not None and ttb > 200:
-        tips.append("• Quicker initial ramp: squeeze to target in ≤150 ms.")
-    if overs and overs > 0:
-        tips.append("• Ease the stab: stop at the band, don’t punch through.")
-    if corr and corr > 0:
-        tips.append("• Hold pressure for 200 ms after entry — avoid corrections.")
-    if rel is not None:
-        if release_goal == "MEDIUM" and not (300 <= rel <= 800):
-            tips.append("• Aim to bleed off in ~500 ms for medium release.")
-        if release_goal == "SLOW" and rel < 800:
-            tips.append("• Slow your release — count ‘one-thousand-and’ to ~0.8–1.0 s.")
-
-    nxt = "• Next drill: target 80% · FAST to band · MEDIUM release · 10 clean reps"
-    if release_goal == "SLOW":
-        nxt = "• Next drill: 50% · MEDIUM to band · SLOW release · 10 clean reps"
-
-    header = "Coach (local):\n"
-    body = "\n".join(tips[:3])
-    return f"{header}{body}\n{nxt}"
+    # Only these five values shape the text, so they are the cache key.
+    return _local_advice_cached(ttb, overs, corr, rel, release_goal)
+
+_TIP_BREATHE     = "• Breathe, then commit to first hit — no early dips."
+_TIP_QUICK_RAMP  = "• Quicker initial ramp: squeeze to target in ≤150 ms."
+_TIP_EASE_STAB   = "• Ease the stab: stop at the band, don’t punch through."
+_TIP_HOLD        = "• Hold pressure for 200 ms after entry — avoid corrections."
+_TIP_REL_MEDIUM  = "• Aim to bleed off in ~500 ms for medium release."
+_TIP_REL_SLOW    = "• Slow your release — count ‘one-thousand-and’ to ~0.8–1.0 s."
+_NEXT_DEFAULT    = "• Next drill: target 80% · FAST to band · MEDIUM release · 10 clean reps"
+_NEXT_SLOW       = "• Next drill: 50% · MEDIUM to band · SLOW release · 10 clean reps"
+_MAX_TIPS = 3
+
+@functools.lru_cache(maxsize=64)
+def _local_advice_cached(ttb: Optional[float], overs: int, corr: int,
+                         rel: Optional[float], release_goal: str) -> str:
+    # Candidates in priority order; None marks a tip that does not apply.
+    candidates = (
+        _TIP_BREATHE,
+        _TIP_QUICK_RAMP if ttb is not None and ttb > 200 else None,
+        _TIP_EASE_STAB if overs and overs > 0 else None,
+        _TIP_HOLD if corr and corr > 0 else None,
+        _TIP_REL_MEDIUM if (rel is not None and release_goal == "MEDIUM"
+                            and not (300 <= rel <= 800)) else None,
+        _TIP_REL_SLOW if (rel is not None and release_goal == "SLOW"
+                          and rel < 800) else None,
+    )
+    body = "\n".join(itertools.islice(filter(None, candidates), _MAX_TIPS))
+    nxt = _NEXT_SLOW if release_goal == "SLOW" else _NEXT_DEFAULT
+    return f"Coach (local):\n{body}\n{nxt}"
 
 # ---------- Public API -------------------------------------------------------
 
-def coach_advice(settings: Dict[str, Any],
+def coach_advice(settings: Mapping[str, Any],
                  recent_summary: str,
                  drill_cfg: Dict[str, Any],
                  session_stats: Dict[str, Any]) -> Optional[str]:
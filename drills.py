@@ -7,6 +7,7 @@ get back *events* with per-rep metrics and pass/fail.
 Usage from UI loop:
     eng = DrillEngine(DrillConfig(target_pct=80, app_goal='FAST', release_goal='MEDIUM'))
     events = eng.update(t_ms, brake01)  # call every frame
+    events = eng.update_batch(ts, bs)   # or a whole recorded trace at once
     for ev in events:
         if ev['type'] == 'rep_complete':
             metrics = ev['metrics']
@@ -21,12 +22,14 @@ Key rules (defaults tuned for load-cell pedals):
     MEDIUM = 300–800 ms; SLOW > 800 ms; (<300 considered too fast for these drills)
 - Band tolerance: ±4% (configurable)
 - Detect overshoot (> target + 6%), early correction (drop ≥6% within 200 ms of entry),
-  oscillation (≥3 band crossings in 500 ms), release bump (+≥5% during release)
+  oscillation (≥3 band crossings in 500 ms), release bump (+≥5% within 50 ms during release)
 - Optional hold requirement: stay in band for ≥ 150 ms (configurable)
 """
 from __future__ import annotations
 from dataclasses import dataclass, field
-from typing import List, Dict, Optional
+from functools import lru_cache
+from collections import deque, namedtuple
+from typing import Deque, List, Dict, Optional, Sequence, Tuple
 
 # ---- Thresholds -------------------------------------------------------------
 FAST_MAX_MS   = 120.0
@@ -38,14 +41,28 @@ BAND_TOL_PCT  = 0.04
 OVER_PCT      = 0.06
 CORRECT_PCT   = 0.06
 RELBUMP_PCT   = 0.05
+RELBUMP_WIN_MS = 50.0   # ...rise measured over this window, not per sample
 ONSET_THRESH  = 0.03
 END_HYST_MS   = 200.0
 HOLD_MIN_MS   = 150.0
 OSC_WIN_MS    = 500.0
 OSC_MIN_CROSS = 3
 
+# Rep states (plain ints so the per-sample comparisons stay cheap)
+_IDLE, _APPLY, _IN_BAND, _RELEASE = range(4)
+
+# Shared "no events" result: most frames complete nothing, so update()
+# returns this instead of allocating an empty list.
+_EMPTY: tuple = ()
+_INF = float('inf')
+TTB_MAX_MS = 400.0                     # must enter the band within this
+
+# Per-rep metrics; field names match the event's 'metrics' dict keys.
+Metrics = namedtuple('Metrics', 'ttb_ms peak_pct overshoot_pct early_correction '
+                                'oscillations release_ms release_bump hold_ms')
+
 # ---- Config -----------------------------------------------------------------
-@dataclass
+@dataclass(slots=True)
 class DrillConfig:
     target_pct: int = 80                 # 10..99
     app_goal: str = 'FAST'               # 'FAST' | 'MEDIUM' | 'ANY'
@@ -55,17 +72,63 @@ class DrillConfig:
     hold_tol: float = 0.03               # for holding drills
     onset_thresh: float = ONSET_THRESH
     end_hysteresis_ms: float = END_HYST_MS
+    # Derived band limits and pass windows, kept in sync with the fields
+    # above so update() and _passed() read plain floats.
+    _target01: float = field(default=0.0, init=False, repr=False)
+    _lo: float = field(default=0.0, init=False, repr=False)
+    _hi: float = field(default=0.0, init=False, repr=False)
+    _ttb_min: float = field(default=-_INF, init=False, repr=False)   # exclusive
+    _ttb_max: float = field(default=TTB_MAX_MS, init=False, repr=False)
+    _rel_min: float = field(default=-_INF, init=False, repr=False)
+    _rel_max: float = field(default=_INF, init=False, repr=False)
+    _hold_need: float = field(default=0.0, init=False, repr=False)
+
+    def __post_init__(self):
+        self._recompute()
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name in _CFG_DERIVED_FROM:
+            try:
+                self._recompute()
+            except AttributeError:
+                pass  # still inside __init__; __post_init__ finishes the job
+
+    def _recompute(self) -> None:
+        tgt = self.target_pct/100.0
+        self._target01 = tgt
+        self._lo = max(0.0, tgt - self.band_tol)
+        self._hi = min(1.0, tgt + self.band_tol)
+        # application goal -> window on time-to-band
+        if self.app_goal == 'FAST':
+            self._ttb_min, self._ttb_max = -_INF, min(TTB_MAX_MS, FAST_MAX_MS)
+        elif self.app_goal == 'MEDIUM':
+            self._ttb_min, self._ttb_max = FAST_MAX_MS, min(TTB_MAX_MS, MED_MAX_MS)
+        else:
+            self._ttb_min, self._ttb_max = -_INF, TTB_MAX_MS
+        # release goal -> window on release time
+        if self.release_goal == 'MEDIUM':
+            self._rel_min, self._rel_max = REL_MED_MIN, REL_MED_MAX
+        elif self.release_goal == 'SLOW':
+            self._rel_min, self._rel_max = REL_SLOW_MIN, _INF
+        else:
+            self._rel_min, self._rel_max = -_INF, _INF
+        self._hold_need = (max(HOLD_MIN_MS, self.hold_required_ms)
+                           if self.hold_required_ms > 0 else 0.0)
 
     def band_low(self) -> float:
-        return max(0.0, self.target_pct/100.0 - self.band_tol)
+        return self._lo
     def band_high(self) -> float:
-        return min(1.0, self.target_pct/100.0 + self.band_tol)
+        return self._hi
+
+_CFG_DERIVED_FROM = frozenset(('target_pct', 'band_tol', 'app_goal',
+                               'release_goal', 'hold_required_ms'))
 
 # ---- Engine -----------------------------------------------------------------
-@dataclass
+@dataclass(slots=True)
 class DrillEngine:
     cfg: DrillConfig
-    state: str = 'IDLE'  # IDLE | APPLY | IN_BAND | RELEASE
+    state: int = _IDLE   # _IDLE | _APPLY | _IN_BAND | _RELEASE
     last_t: Optional[float] = None
     last_b: float = 0.0
     onset_t: Optional[float] = None
@@ -75,11 +138,17 @@ class DrillEngine:
     peak: float = 0.0
     overshoot: float = 0.0
     did_correction: bool = False
-    crosses: List[float] = field(default_factory=list)
+    # Band-crossing times within OSC_WIN_MS of the latest crossing
+    crosses: Deque[float] = field(default_factory=deque)
     release_bump: bool = False
+    # (t, b) of the release's rising lows within RELBUMP_WIN_MS; the head is
+    # the window minimum, so the rise is b - head in O(1) amortized
+    _rel_lows: Deque[Tuple[float, float]] = field(default_factory=deque, repr=False)
+    # Whether last_b was inside the band; compared against each new sample
+    _last_in: bool = field(default=False, repr=False)
 
     def reset_rep(self):
-        self.state = 'IDLE'
+        self.state = _IDLE
         self.onset_t = None
         self.first_inband_t = None
         self.last_inband_t = None
@@ -89,79 +158,132 @@ class DrillEngine:
         self.did_correction = False
         self.crosses.clear()
         self.release_bump = False
+        self._rel_lows.clear()
 
-    def update(self, t_ms: float, b: float) -> List[Dict]:
-        """Feed one sample. Returns list of events (may be empty).
-        Each event: {'type': 'rep_complete', 'metrics': {...}, 'passed': bool}
+    def update(self, t_ms: float, b: float) -> Sequence[Dict]:
+        """Feed one sample. Returns a sequence of events (usually empty).
+        Each event: {'type': 'rep_complete', 'metrics': {...}, 'passed': bool, 't_ms': float}
         """
-        events: List[Dict] = []
+        # Bind everything the per-sample path reads to locals up front
         cfg = self.cfg
-        lo, hi = cfg.band_low(), cfg.band_high()
+        lo = cfg._lo; hi = cfg._hi; tgt = cfg._target01
+        onset_thresh = cfg.onset_thresh; end_hyst = cfg.end_hysteresis_ms
+        corr = CORRECT_PCT; relbump = RELBUMP_PCT; over = OVER_PCT
+
+        # In-band test done once per sample and reused below
+        in_now = (b >= lo) & (b <= hi)
+
+        # Fast path for the pedal resting between reps: no crossing, no new
+        # peak and no onset, so only the last-sample bookkeeping changes.
+        if (self.state == _IDLE and b < onset_thresh and b <= self.peak
+                and in_now == self._last_in):
+            self.last_t = t_ms
+            self.last_b = b
+            return _EMPTY
 
         # Track band crossings for oscillation detection
         if self.last_t is None:
             self.last_t = t_ms
             self.last_b = b
         else:
-            was_in = lo <= self.last_b <= hi
-            now_in = lo <= b <= hi
-            if was_in != now_in:
-                self.crosses.append(t_ms)
+            if in_now ^ self._last_in:
+                crosses = self.crosses
+                crosses.append(t_ms)
+                cutoff = t_ms - OSC_WIN_MS
+                while crosses[0] < cutoff:
+                    crosses.popleft()
             self.last_t = t_ms
             self.last_b = b
+        self._last_in = in_now
 
         # Update peak & overshoot
         if b > self.peak:
             self.peak = b
-            if b > hi + OVER_PCT:
-                self.overshoot = max(self.overshoot, b - (self.cfg.target_pct/100.0))
+            if b > hi + over:
+                self.overshoot = max(self.overshoot, b - tgt)
 
         # State machine
-        if self.state == 'IDLE':
-            if b >= cfg.onset_thresh:
-                self.state = 'APPLY'
+        if self.state == _IDLE:
+            if b >= onset_thresh:
+                self.state = _APPLY
                 self.onset_t = t_ms
-        elif self.state == 'APPLY':
-            if lo <= b <= hi:
-                self.state = 'IN_BAND'
+        elif self.state == _APPLY:
+            if in_now:
+                self.state = _IN_BAND
                 self.first_inband_t = t_ms
                 self.last_inband_t = t_ms
             # Early correction: after entering band we check dips, so nothing here yet
-        elif self.state == 'IN_BAND':
+        elif self.state == _IN_BAND:
             # update last-in-band
-            if lo <= b <= hi:
+            if in_now:
                 self.last_inband_t = t_ms
                 # detect early correction within 200 ms of first entry
                 if (t_ms - (self.first_inband_t or t_ms)) <= 200.0:
-                    if b < (self.cfg.target_pct/100.0 - CORRECT_PCT):
+                    if b < (tgt - corr):
                         self.did_correction = True
             else:
                 # left the band → move to RELEASE phase
-                self.state = 'RELEASE'
-        elif self.state == 'RELEASE':
-            # release bump: any upward movement ≥5% after leaving band
-            if self.last_b is not None and (b - self.last_b) >= RELBUMP_PCT:
+                self.state = _RELEASE
+        elif self.state == _RELEASE:
+            # release bump: a rise ≥5% above the lowest point of the last
+            # RELBUMP_WIN_MS, so the test does not depend on the sample rate
+            lows = self._rel_lows
+            while lows and lows[-1][1] >= b:
+                lows.pop()
+            lows.append((t_ms, b))
+            cutoff = t_ms - RELBUMP_WIN_MS
+            while lows[0][0] < cutoff:
+                lows.popleft()
+            if b - lows[0][1] >= relbump:
                 self.release_bump = True
 
         # End-of-rep detection: below onset for a while
-        if self.state in ('APPLY','IN_BAND','RELEASE'):
-            if b < cfg.onset_thresh:
+        if self.state != _IDLE:
+            if b < onset_thresh:
                 if self.end_candidate_t is None:
                     self.end_candidate_t = t_ms
-                elif (t_ms - self.end_candidate_t) >= cfg.end_hysteresis_ms:
+                elif (t_ms - self.end_candidate_t) >= end_hyst:
                     # finalize rep
                     metrics = self._finalize_metrics()
                     passed = self._passed(metrics)
-                    events.append({'type':'rep_complete','metrics':metrics,'passed':passed})
                     self.reset_rep()
                     # after reset, keep sampling
+                    return [{'type':'rep_complete','metrics':metrics._asdict(),'passed':passed,'t_ms':t_ms}]
             else:
                 self.end_candidate_t = None
 
+        return _EMPTY
+
+    def update_batch(self, ts: Sequence[float], bs: Sequence[float]) -> List[Dict]:
+        """Feed a run of samples (e.g. a recorded trace) in one call.
+        Returns all events in order, same as calling update() per sample.
+        """
+        events: List[Dict] = []
+        update = self.update
+        cfg = self.cfg
+        lo = cfg._lo; hi = cfg._hi; onset_thresh = cfg.onset_thresh
+        idle = self.state == _IDLE; peak = self.peak; last_in = self._last_in
+        rest_t = rest_b = None
+        for t_ms, b in zip(ts, bs):
+            # update()'s resting-pedal fast path, inlined so idle stretches
+            # cost no method call; only the last such sample is kept
+            if (idle and b < onset_thresh and b <= peak
+                    and ((b >= lo) & (b <= hi)) == last_in):
+                rest_t = t_ms; rest_b = b
+                continue
+            if rest_t is not None:
+                self.last_t = rest_t; self.last_b = rest_b
+                rest_t = None
+            ev = update(t_ms, b)
+            if ev:
+                events.extend(ev)
+            idle = self.state == _IDLE; peak = self.peak; last_in = self._last_in
+        if rest_t is not None:
+            self.last_t = rest_t; self.last_b = rest_b
         return events
 
     # -- metrics & grading ---------------------------------------------------
-    def _finalize_metrics(self) -> Dict:
+    def _finalize_metrics(self) -> Metrics:
         cfg = self.cfg
         onset = self.onset_t
         first = self.first_inband_t
@@ -171,63 +293,32 @@ class DrillEngine:
         if last is not None and self.end_candidate_t is not None:
             # Approx release time: last in band → time we first went <3% (the end_candidate start)
             release_ms = max(0.0, self.end_candidate_t - last)
-        # Oscillations in a short window
-        osc = 0
-        if self.crosses:
-            t0 = self.crosses[-1] - OSC_WIN_MS
-            osc = sum(1 for t in self.crosses if t >= t0)
+        # Oscillations in a short window (update() keeps only that window)
+        osc = len(self.crosses)
         # Hold time if required
         hold_ms = 0.0
         if first is not None and last is not None:
             hold_ms = max(0.0, last - first)
         # Overshoot against target
-        overshoot_pct = max(0.0, self.peak - (cfg.target_pct/100.0))
-        return {
-            'ttb_ms': ttb,
-            'peak_pct': self.peak*100.0,
-            'overshoot_pct': overshoot_pct*100.0,
-            'early_correction': self.did_correction,
-            'oscillations': osc,
-            'release_ms': release_ms,
-            'release_bump': self.release_bump,
-            'hold_ms': hold_ms,
-        }
+        overshoot_pct = max(0.0, self.peak - cfg._target01)
+        return Metrics(ttb, self.peak*100.0, overshoot_pct*100.0, self.did_correction,
+                       osc, release_ms, self.release_bump, hold_ms)
 
-    def _passed(self, m: Dict) -> bool:
+    def _passed(self, m: Metrics) -> bool:
+        # Goal-dependent windows are precomputed on the config (see _recompute)
         cfg = self.cfg
-        # must enter band within 400ms
-        if m['ttb_ms'] is None or m['ttb_ms'] > 400.0:
-            return False
-        # application goal
-        if cfg.app_goal == 'FAST' and not (m['ttb_ms'] <= FAST_MAX_MS):
-            return False
-        if cfg.app_goal == 'MEDIUM' and not (FAST_MAX_MS < m['ttb_ms'] <= MED_MAX_MS):
-            return False
-        # overshoot & early correction
-        if m['overshoot_pct'] > OVER_PCT*100.0:
-            return False
-        if m['early_correction']:
-            return False
-        # hold requirement (if any)
-        if cfg.hold_required_ms > 0 and (m['hold_ms'] < max(HOLD_MIN_MS, cfg.hold_required_ms)):
-            return False
-        # release goal
-        if m['release_ms'] is None:
-            return False
-        if cfg.release_goal == 'MEDIUM' and not (REL_MED_MIN <= m['release_ms'] <= REL_MED_MAX):
-            return False
-        if cfg.release_goal == 'SLOW' and not (m['release_ms'] >= REL_SLOW_MIN):
-            return False
-        # no big release bump
-        if m['release_bump']:
-            return False
-        # oscillations
-        if m['oscillations'] >= OSC_MIN_CROSS:
-            return False
-        return True
+        ttb = m.ttb_ms
+        rel = m.release_ms
+        return (ttb is not None and cfg._ttb_min < ttb <= cfg._ttb_max   # app goal, ≤400 ms
+                and m.overshoot_pct <= OVER_PCT*100.0
+                and not m.early_correction
+                and m.hold_ms >= cfg._hold_need
+                and rel is not None and cfg._rel_min <= rel <= cfg._rel_max
+                and not m.release_bump
+                and m.oscillations < OSC_MIN_CROSS)
 
 # ---- Streak/session tracker -------------------------------------------------
-@dataclass
+@dataclass(slots=True)
 class StreakTracker:
     goal: int = 10
     streak: int = 0
@@ -260,61 +351,97 @@ class StreakTracker:
         }
 
 # ---- Feedback strings -------------------------------------------------------
+# Fixed text and thresholds are baked in once; only the measured values are
+# formatted, and only when their rule fires.
+_GOOD_REP      = 'Good rep — matches the drill targets.'
+_FB_NO_BAND    = 'Never reached the target band — apply quicker to reach it within 400 ms.'
+_FB_APP_SLOW   = f'Application too slow ({{:.0f}} ms). Goal ≤ {FAST_MAX_MS:.0f} ms. Push faster initially.'.format
+_FB_APP_OFF    = f'Application off target ({{:.0f}} ms). Aim for {FAST_MAX_MS:.0f}–{MED_MAX_MS:.0f} ms.'.format
+_FB_OVERSHOOT  = 'Overshoot +{:.0f}%. Ease initial stab and stop at target.'.format
+_FB_CORRECTION = 'Early correction detected — commit to first hit, avoid dropping below target.'
+_FB_OSCILLATE  = 'Oscillation detected — smooth the application and release.'
+_FB_REL_OFF    = f'Release {{:.0f}} ms is off. Aim for {REL_MED_MIN:.0f}–{REL_MED_MAX:.0f} ms.'.format
+_FB_REL_FAST   = f'Release {{:.0f}} ms too fast. Aim ≥ {REL_SLOW_MIN:.0f} ms.'.format
+_FB_REL_BUMP   = 'Release bump detected — avoid re-adding pressure on exit.'
+_FB_HOLD_SHORT = 'Hold too short ({:.0f} ms). Hold ≥ {:.0f} ms inside the band.'.format
+_FB_SEP = ' · '
+
+# Which application / release message applies (computed on the exact values)
+_APP_OK, _APP_NO_BAND, _APP_SLOW, _APP_OFF = range(4)
+_REL_OK, _REL_OFF, _REL_FAST = range(3)
 
 def feedback_for(metrics: Dict, cfg: DrillConfig) -> str:
-    msgs: List[str] = []
+    # Classify on the exact metrics, then build the text from the numbers as
+    # displayed (whole ms / %), so reps that read the same share a cache entry.
+    # round() and '{:.0f}' round identically, so the text is unchanged.
     ttb = metrics['ttb_ms']
+    app = _APP_OK
     if ttb is None:
-        msgs.append('Never reached the target band — apply quicker to reach it within 400 ms.')
-    else:
-        if cfg.app_goal == 'FAST' and ttb > FAST_MAX_MS:
-            msgs.append(f'Application too slow ({ttb:.0f} ms). Goal ≤ {FAST_MAX_MS:.0f} ms. Push faster initially.')
-        elif cfg.app_goal == 'MEDIUM' and not (FAST_MAX_MS < ttb <= MED_MAX_MS):
-            msgs.append(f'Application off target ({ttb:.0f} ms). Aim for {FAST_MAX_MS:.0f}–{MED_MAX_MS:.0f} ms.')
-    if metrics['overshoot_pct'] > OVER_PCT*100.0:
-        msgs.append(f'Overshoot +{metrics["overshoot_pct"]:.0f}%. Ease initial stab and stop at target.')
-    if metrics['early_correction']:
-        msgs.append('Early correction detected — commit to first hit, avoid dropping below target.')
-    if metrics['oscillations'] >= OSC_MIN_CROSS:
-        msgs.append('Oscillation detected — smooth the application and release.')
+        app = _APP_NO_BAND
+    elif cfg.app_goal == 'FAST':
+        if ttb > FAST_MAX_MS:
+            app = _APP_SLOW
+    elif cfg.app_goal == 'MEDIUM' and not (FAST_MAX_MS < ttb <= MED_MAX_MS):
+        app = _APP_OFF
+    over = metrics['overshoot_pct']
     rm = metrics['release_ms']
+    rel = _REL_OK
     if rm is not None:
-        if cfg.release_goal == 'MEDIUM' and not (REL_MED_MIN <= rm <= REL_MED_MAX):
-            msgs.append(f'Release {rm:.0f} ms is off. Aim for {REL_MED_MIN:.0f}–{REL_MED_MAX:.0f} ms.')
-        if cfg.release_goal == 'SLOW' and rm < REL_SLOW_MIN:
-            msgs.append(f'Release {rm:.0f} ms too fast. Aim ≥ {REL_SLOW_MIN:.0f} ms.')
-    if metrics['release_bump']:
-        msgs.append('Release bump detected — avoid re-adding pressure on exit.')
-    if cfg.hold_required_ms > 0 and metrics['hold_ms'] < max(HOLD_MIN_MS, cfg.hold_required_ms):
-        need = max(HOLD_MIN_MS, cfg.hold_required_ms)
-        msgs.append(f'Hold too short ({metrics["hold_ms"]:.0f} ms). Hold ≥ {need:.0f} ms inside the band.')
-    if not msgs:
-        return 'Good rep — matches the drill targets.'
-    return ' · '.join(msgs)
+        if cfg.release_goal == 'MEDIUM':
+            if not (REL_MED_MIN <= rm <= REL_MED_MAX):
+                rel = _REL_OFF
+        elif cfg.release_goal == 'SLOW' and rm < REL_SLOW_MIN:
+            rel = _REL_FAST
+    need = cfg._hold_need
+    hold = metrics['hold_ms']
+    return _feedback_text(
+        app, round(ttb) if app >= _APP_SLOW else None,
+        round(over) if over > OVER_PCT*100.0 else None,
+        bool(metrics['early_correction']),
+        metrics['oscillations'] >= OSC_MIN_CROSS,
+        rel, round(rm) if rel else None,
+        bool(metrics['release_bump']),
+        (round(hold), round(need)) if need and hold < need else None)
+
+@lru_cache(maxsize=512)
+def _feedback_text(app: int, ttb: Optional[int], over: Optional[int], corr: bool,
+                   osc: bool, rel: int, rm: Optional[int], bump: bool,
+                   hold: Optional[tuple]) -> str:
+    msgs: List[str] = []
+    if app == _APP_NO_BAND:
+        msgs.append(_FB_NO_BAND)
+    elif app == _APP_SLOW:
+        msgs.append(_FB_APP_SLOW(ttb))
+    elif app == _APP_OFF:
+        msgs.append(_FB_APP_OFF(ttb))
+    if over is not None:
+        msgs.append(_FB_OVERSHOOT(over))
+    if corr:
+        msgs.append(_FB_CORRECTION)
+    if osc:
+        msgs.append(_FB_OSCILLATE)
+    if rel == _REL_OFF:
+        msgs.append(_FB_REL_OFF(rm))
+    elif rel == _REL_FAST:
+        msgs.append(_FB_REL_FAST(rm))
+    if bump:
+        msgs.append(_FB_REL_BUMP)
+    if hold is not None:
+        msgs.append(_FB_HOLD_SHORT(*hold))
+    return _FB_SEP.join(msgs) if msgs else _GOOD_REP
 
 # ---- Quick self-test --------------------------------------------------------
 if __name__ == '__main__':
     # Synthetic test: one fast-to-80% rep with medium release
     cfg = DrillConfig(target_pct=80, app_goal='FAST', release_goal='MEDIUM')
     eng = DrillEngine(cfg)
-    t = 0.0
-    evs_all: List[dict] = []
-    # idle 200ms
-    for _ in range(20): t+=10; evs_all += eng.update(t, 0.0)
-    # fast ramp to ~0.8 in 100ms
-    for k in range(10):
-        t+=10
-        b = min(0.8, 0.08*k)
-        evs_all += eng.update(t, b)
-    # hold 200ms
-    for _ in range(20): t+=10; evs_all += eng.update(t, 0.8)
-    # medium release ~500ms down to 0
-    for k in range(50):
-        t+=10
-        b = max(0.0, 0.8*(1 - k/50))
-        evs_all += eng.update(t, b)
-    # stabilize below threshold 300ms
-    for _ in range(30): t+=10; evs_all += eng.update(t, 0.0)
+    bs = ([0.0]*20                                          # idle 200ms
+          + [min(0.8, 0.08*k) for k in range(10)]           # fast ramp to ~0.8 in 100ms
+          + [0.8]*20                                        # hold 200ms
+          + [max(0.0, 0.8*(1 - k/50)) for k in range(50)]   # medium release ~500ms down to 0
+          + [0.0]*30)                                       # stabilize below threshold 300ms
+    ts = [10.0*(i + 1) for i in range(len(bs))]
+    evs_all: List[dict] = eng.update_batch(ts, bs)
 
     reps = [e for e in evs_all if e['type']=='rep_complete']
     assert len(reps)==1, f"expected 1 rep, got {len(reps)}"
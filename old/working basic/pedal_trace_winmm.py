@@ -15,7 +15,7 @@
 # You can change these from the UI if needed.
 
 from __future__ import annotations
-import time, csv
+import math, time, csv
 from dataclasses import dataclass
 from collections import deque
 from typing import Optional, Tuple
@@ -47,29 +47,42 @@ class JOYINFOEX(ctypes.Structure):
         ('dwReserved2', wintypes.DWORD),
     ]
 
+# Declare the signatures once so ctypes doesn't have to guess on every call
+joyGetNumDevs.argtypes = []
+joyGetNumDevs.restype  = wintypes.UINT
+joyGetPosEx.argtypes   = [wintypes.UINT, ctypes.POINTER(JOYINFOEX)]
+joyGetPosEx.restype    = wintypes.UINT
+
 JOY_RETURNALL = 0xFF
 MAX_DEVICES   = 16
 AXIS_NAMES = ["X", "Y", "Z", "Rx", "Ry", "Rz"]
 
 # ----- Helpers -----
-@dataclass
+@dataclass(slots=True)
 class NormCfg:
     invert: bool = False
     deadzone: float = 0.02
     zero_raw: float = 0.0
 
-class EMA:
-    def __init__(self, ms: float = 20.0):
-        self.ms = ms; self._init=False; self.y=0.0; self.t=None
+class OneEuro:
+    """One Euro filter (Casiez et al.): a low-pass whose cutoff rises with the
+    signal's speed, so holds stay smooth while fast stabs keep little lag.
+    min_cutoff is in Hz (<= 0 passes input through); beta adds Hz per unit/s."""
+    __slots__ = ('min_cutoff', 'beta', 'd_cutoff', 'y', 'dy', 't')
+    def __init__(self, min_cutoff: float = 8.0, beta: float = 2.0, d_cutoff: float = 1.0):
+        self.min_cutoff=min_cutoff; self.beta=beta; self.d_cutoff=d_cutoff
+        self.reset()
     def reset(self):
-        self._init=False; self.y=0.0; self.t=None
+        self.y=0.0; self.dy=0.0; self.t=None
     def step(self, x: float, now: float) -> float:
-        if not self._init:
-            self._init=True; self.t=now; self.y=x; return x
-        dt=max(1e-6, now-(self.t or now)); self.t=now
-        if self.ms<=0: self.y=x; return x
-        a=min(1.0, dt/(self.ms/1000.0))
-        self.y=a*x+(1-a)*self.y
+        if self.t is None or self.min_cutoff <= 0:
+            self.t=now; self.y=x; self.dy=0.0; return x
+        te=max(1e-6, now-self.t); self.t=now
+        w=2.0*math.pi*te
+        r=w*self.d_cutoff; a=r/(1.0+r)
+        self.dy=a*((x-self.y)/te)+(1.0-a)*self.dy
+        r=w*(self.min_cutoff+self.beta*abs(self.dy)); a=r/(1.0+r)
+        self.y=a*x+(1.0-a)*self.y
         return self.y
 
 def raw01_from_uint(v: int) -> float:
@@ -78,15 +91,15 @@ def raw01_from_uint(v: int) -> float:
     return v/65535.0
 
 def map_norm(v_uint: int, cfg: NormCfg) -> float:
-    x = raw01_from_uint(v_uint)
+    # No pre-clamp of the raw value: out-of-range input ends up below 0 or
+    # above 1 here and the single clamp at the end handles it. floor is
+    # capped at 0.98, so the denominator is never near zero.
+    x = v_uint / 65535.0
     if cfg.invert:
         x = 1.0 - x
-    z = cfg.zero_raw
-    floor = min(0.98, z + cfg.deadzone)
-    if x <= floor:
-        return 0.0
-    den = 1.0 - floor
-    return max(0.0, min(1.0, (x - floor)/den if den>1e-9 else 0.0))
+    floor = min(0.98, cfg.zero_raw + cfg.deadzone)
+    y = (x - floor) / (1.0 - floor)
+    return 0.0 if y <= 0.0 else 1.0 if y > 1.0 else y
 
 # ----- Backend -----
 class WinMMBackend:
@@ -94,50 +107,53 @@ class WinMMBackend:
         self.dev_id = 0  # default from your probe
         self.axis_brake = 'Y'
         self.axis_thr   = 'X'
+        # AXIS_NAMES indices of the two axes above; kept in sync by App.apply_axes
+        self._ax_b_idx = 1
+        self._ax_t_idx = 0
         self.cfg_b = NormCfg(invert=False)
         self.cfg_t = NormCfg(invert=False)
-        self.ema_b = EMA(20.0)
-        self.ema_t = EMA(20.0)
+        self.filt_b = OneEuro()
+        self.filt_t = OneEuro()
         self.t0 = None
+        # one JOYINFOEX reused by every read instead of allocating per poll
+        self._joy = JOYINFOEX(); self._joy.dwSize=ctypes.sizeof(JOYINFOEX); self._joy.dwFlags=JOY_RETURNALL
+        self._joy_ref = ctypes.byref(self._joy)
 
     @staticmethod
     def list_devices():
         n = joyGetNumDevs()
         found = []
+        j = JOYINFOEX(); j.dwSize=ctypes.sizeof(JOYINFOEX); j.dwFlags=JOY_RETURNALL
+        ref = ctypes.byref(j)
         for i in range(min(n, MAX_DEVICES)):
-            j = JOYINFOEX(); j.dwSize=ctypes.sizeof(JOYINFOEX); j.dwFlags=JOY_RETURNALL
-            r = joyGetPosEx(i, ctypes.byref(j))
+            r = joyGetPosEx(i, ref)
             if r == 0:
                 found.append(i)
         return found
 
     def _read(self, dev_id: int) -> Optional[Tuple[int,int,int,int,int,int]]:
-        j = JOYINFOEX(); j.dwSize=ctypes.sizeof(JOYINFOEX); j.dwFlags=JOY_RETURNALL
-        r = joyGetPosEx(dev_id, ctypes.byref(j))
+        r = joyGetPosEx(dev_id, self._joy_ref)
         if r != 0:
             return None
+        j = self._joy
         return (j.dwXpos, j.dwYpos, j.dwZpos, j.dwRpos, j.dwUpos, j.dwVpos)
 
     def calibrate_zero(self):
         vals = self._read(self.dev_id)
         if not vals: return (0.0,0.0)
-        ax_idx = AXIS_NAMES.index(self.axis_brake)
-        at_idx = AXIS_NAMES.index(self.axis_thr)
-        self.cfg_b.zero_raw = raw01_from_uint(vals[ax_idx])
-        self.cfg_t.zero_raw = raw01_from_uint(vals[at_idx])
+        self.cfg_b.zero_raw = raw01_from_uint(vals[self._ax_b_idx])
+        self.cfg_t.zero_raw = raw01_from_uint(vals[self._ax_t_idx])
         return (self.cfg_b.zero_raw, self.cfg_t.zero_raw)
 
     def poll(self):
         vals = self._read(self.dev_id)
         if not vals: return None
-        ax_idx = AXIS_NAMES.index(self.axis_brake)
-        at_idx = AXIS_NAMES.index(self.axis_thr)
-        b = map_norm(vals[ax_idx], self.cfg_b)
-        t = map_norm(vals[at_idx], self.cfg_t)
+        b = map_norm(vals[self._ax_b_idx], self.cfg_b)
+        t = map_norm(vals[self._ax_t_idx], self.cfg_t)
         now = time.perf_counter()
         if self.t0 is None: self.t0 = now
-        b = self.ema_b.step(b, now)
-        t = self.ema_t.step(t, now)
+        b = self.filt_b.step(b, now)
+        t = self.filt_t.step(t, now)
         return ( (now-self.t0)*1000.0, b, t, vals )
 
 # ----- UI -----
@@ -149,6 +165,12 @@ class App(tk.Tk):
         self.backend = WinMMBackend()
         self.window_seconds = tk.DoubleVar(value=8.0)
         self.buffer = deque(maxlen=120*60*5)
+        self._last_sample = None    # newest poll() result, for the draw tick
+        self._running = False       # _loop/_draw_loop reschedule while set
+        self._loop_id = None        # their pending after() ids
+        self._draw_id = None
+        self._axis_shown_at = 0.0   # perf_counter() of the last monitor refresh
+        self._tree_vals = (0,)*len(AXIS_NAMES)  # raw values currently shown
         self._build_ui(); self.refresh()
 
     def _build_ui(self):
@@ -169,11 +191,13 @@ class App(tk.Tk):
         ttk.Label(top, text='Deadzone').grid(row=3,column=0,sticky='w')
         self.dz = tk.DoubleVar(value=0.02)
         ttk.Spinbox(top, from_=0.0, to=0.2, increment=0.005, textvariable=self.dz, width=7, command=self.apply_axes).grid(row=3,column=1,sticky='w')
-        ttk.Label(top, text='Smoothing (ms)').grid(row=3,column=2,sticky='w')
-        self.sm = tk.IntVar(value=20)
-        ttk.Spinbox(top, from_=0, to=200, increment=5, textvariable=self.sm, width=7, command=self.apply_axes).grid(row=3,column=3,sticky='w')
+        ttk.Label(top, text='Min cutoff (Hz)').grid(row=3,column=2,sticky='w')
+        self.sm = tk.DoubleVar(value=8.0)
+        ttk.Spinbox(top, from_=0, to=50, increment=0.5, textvariable=self.sm, width=7, command=self.apply_axes).grid(row=3,column=3,sticky='w')
         ttk.Label(top, text='Window (s)').grid(row=3,column=4,sticky='w')
         self.win = tk.DoubleVar(value=8.0)
+        self._win_ms = 8000.0       # plot window (ms), kept in sync by _on_win_change
+        self.win.trace_add('write', self._on_win_change)
         ttk.Spinbox(top, from_=2, to=30, increment=1, textvariable=self.win, width=7).grid(row=3,column=5,sticky='w')
 
         ttk.Button(top, text='Calibrate zero', command=self.calibrate).grid(row=4,column=0,pady=6,sticky='w')
@@ -184,12 +208,21 @@ class App(tk.Tk):
         cwrap = ttk.Frame(self); cwrap.pack(fill=tk.BOTH, expand=True, padx=12, pady=8)
         self.canvas = tk.Canvas(cwrap, bg='#0a0f19', highlightthickness=0)
         self.canvas.pack(fill=tk.BOTH, expand=True)
+        # persistent plot items (grid below traces); _draw only moves them
+        off = (-10, -10, -10, -10)
+        self._grid_ids = [self.canvas.create_line(*off, fill='#162033') for _ in range(11)]
+        self._line_b = self.canvas.create_line(*off, fill='#48a0ff', width=2)
+        self._line_t = self.canvas.create_line(*off, fill='#7cdb6f', width=2)
+        self._plot_size = (1000, 360)   # canvas (w, h), updated on <Configure>
+        self.canvas.bind('<Configure>', self._on_resize)
         self.debug = ttk.Label(self, text='', foreground='#93a0b3'); self.debug.pack(anchor='w', padx=12)
 
         mon = ttk.Frame(self); mon.pack(fill=tk.BOTH, expand=False, padx=12, pady=(0,12))
         ttk.Label(mon, text='Axis Monitor (raw 0..65535)', font=('Segoe UI', 10, 'bold')).pack(anchor='w')
         self.tree = ttk.Treeview(mon, columns=('val',), show='headings', height=8)
         self.tree.heading('val', text='Value'); self.tree.column('val', width=360, anchor='w'); self.tree.pack(fill=tk.X, expand=True)
+        # one row per axis, created once and updated in place by _loop
+        self._tree_rows = [self.tree.insert('', 'end', values=(f'{name}: 0',)) for name in AXIS_NAMES]
 
         try:
             ttk.Style().theme_use('clam')
@@ -217,10 +250,12 @@ class App(tk.Tk):
     def apply_axes(self):
         self.backend.axis_brake = self.br_combo.get()
         self.backend.axis_thr   = self.th_combo.get()
+        self.backend._ax_b_idx = AXIS_NAMES.index(self.backend.axis_brake)
+        self.backend._ax_t_idx = AXIS_NAMES.index(self.backend.axis_thr)
         self.backend.cfg_b.invert = bool(self.br_inv.get())
         self.backend.cfg_t.invert = bool(self.th_inv.get())
         dz = float(self.dz.get()); self.backend.cfg_b.deadzone = dz; self.backend.cfg_t.deadzone = dz
-        ms = float(self.sm.get()); self.backend.ema_b.ms = ms; self.backend.ema_t.ms = ms
+        fc = float(self.sm.get()); self.backend.filt_b.min_cutoff = fc; self.backend.filt_t.min_cutoff = fc
 
     def calibrate(self):
         zb, zt = self.backend.calibrate_zero()
@@ -228,11 +263,16 @@ class App(tk.Tk):
 
     # ---- Run/plot ----
     def start(self):
-        self.buffer.clear(); self.btn_start.config(state=tk.DISABLED); self.btn_stop.config(state=tk.NORMAL)
-        self.backend.t0=None; self.backend.ema_b.reset(); self.backend.ema_t.reset()
+        self._cancel_loops()  # a quick Stop/Start must not leave a second chain running
+        self.buffer.clear(); self._running = True
+        self.btn_start.config(state=tk.DISABLED); self.btn_stop.config(state=tk.NORMAL)
+        self.backend.t0=None; self.backend.filt_b.reset(); self.backend.filt_t.reset()
+        self._last_sample = None
         self._loop()
+        self._draw_loop()
 
     def stop(self):
+        self._running = False; self._cancel_loops()
         self.btn_start.config(state=tk.NORMAL); self.btn_stop.config(state=tk.DISABLED)
 
     def save_csv(self):
@@ -244,47 +284,71 @@ class App(tk.Tk):
             for t,b,tb in self.buffer: w.writerow([int(t), f'{b:.4f}', f'{tb:.4f}'])
 
     def _loop(self):
-        # Monitor
-        vals = self.backend._read(self.backend.dev_id)
-        self.tree.delete(*self.tree.get_children())
-        if vals:
-            for name, v in zip(AXIS_NAMES, vals):
-                self.tree.insert('', 'end', values=(f'{name}: {v}',))
-        # Plot
+        # Sample every 8 ms; drawing runs on its own ~60 Hz tick (_draw_loop)
         sample = self.backend.poll()
         if sample:
             t,b,tb,raw = sample
             self.buffer.append((t,b,tb))
+            self._last_sample = sample
+        self._loop_id = self.after(8, self._loop) if self._running else None
+
+    def _draw_loop(self):
+        sample = self._last_sample
+        if sample:
+            t,b,tb,raw = sample
+            # poll() also returns the raw axes; the monitor only needs 5 Hz
+            now = time.perf_counter()
+            if now - self._axis_shown_at >= 0.2:
+                self._axis_shown_at = now
+                for rid, name, v, old in zip(self._tree_rows, AXIS_NAMES, raw, self._tree_vals):
+                    if v != old:
+                        self.tree.item(rid, values=(f'{name}: {v}',))
+                self._tree_vals = raw
             self._draw()
             self.debug.config(text=f'Brake: {b:.3f}   Throttle: {tb:.3f}   Raw: {raw}')
-        if str(self.btn_stop['state']) == 'normal':
-            self.after(8, self._loop)
+        self._draw_id = self.after(16, self._draw_loop) if self._running else None
 
-    def _draw(self):
-        w = self.canvas.winfo_width() or 1000
-        h = self.canvas.winfo_height() or 360
-        self.canvas.delete('all')
-        for i in range(0,11):
+    def _cancel_loops(self):
+        if self._loop_id is not None: self.after_cancel(self._loop_id); self._loop_id = None
+        if self._draw_id is not None: self.after_cancel(self._draw_id); self._draw_id = None
+
+    def _on_win_change(self, *_):
+        try:
+            self._win_ms = max(2.0, float(self.win.get())) * 1000.0
+        except (tk.TclError, ValueError):
+            pass  # half-typed entry: keep the last good value
+
+    def _on_resize(self, event):
+        w, h = event.width or 1000, event.height or 360
+        for i, item in enumerate(self._grid_ids):
             y = h - int(h*(i/10))
-            self.canvas.create_line(0,y,w,y,fill='#162033')
-        if not self.buffer: return
-        t_now = self.buffer[-1][0]/1000.0
-        T = max(2.0, float(self.win.get()))
-        t_min = max(0.0, t_now - T)
-        def x_at(tms): return int(((tms/1000.0 - t_min)/T) * w)
-        def y_at(v): return int(h - v*h)
-        last=None
-        for t,b,_ in self.buffer:
-            if t/1000.0 < t_min: continue
-            pt=(x_at(t), y_at(b))
-            if last: self.canvas.create_line(last[0],last[1],pt[0],pt[1], fill='#48a0ff', width=2)
-            last=pt
-        last=None
-        for t,_,tb in self.buffer:
-            if t/1000.0 < t_min: continue
-            pt=(x_at(t), y_at(tb))
-            if last: self.canvas.create_line(last[0],last[1],pt[0],pt[1], fill='#7cdb6f', width=2)
-            last=pt
+            self.canvas.coords(item, 0, y, w, y)
+        self._plot_size = (w, h)
+
+    def _draw(self):
+        w, h = self._plot_size
+        cv = self.canvas
+        off = (-10, -10, -10, -10)
+        if not self.buffer:
+            cv.coords(self._line_b, off); cv.coords(self._line_t, off)
+            return
+        T_ms = self._win_ms
+        t_min_ms = max(0.0, self.buffer[-1][0] - T_ms)
+        kx = w / T_ms
+        # walk back from the newest sample only as far as the window reaches
+        xy_b = []; xy_t = []
+        for t,b,tb in reversed(self.buffer):
+            if t < t_min_ms: break
+            x = int((t - t_min_ms) * kx)
+            xy_b += (int(h - b*h), x)
+            xy_t += (int(h - tb*h), x)
+        if len(xy_b) < 4:
+            cv.coords(self._line_b, off); cv.coords(self._line_t, off)
+            return
+        # one polyline per pedal: a single coords call instead of a line item per segment
+        xy_b.reverse(); xy_t.reverse()
+        cv.coords(self._line_b, xy_b)
+        cv.coords(self._line_t, xy_t)
 
 if __name__ == '__main__':
     app = App()
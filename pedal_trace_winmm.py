@@ -1,6 +1,6 @@
 # Pedal Trace  Windows (FINAL Modular Main)
 # -----------------------------------------
-# UI runner wired to: backend_winmm.py, drills.py, coach.py
+# UI runner wired to: backend_winmm.py, drills.py, coach.py, ring.py
 #
 # Features
 # • WinMM backend (joy.cpl layer) — no SDL/pygame/HID
@@ -18,9 +18,8 @@
 #   python pedal_trace_winmm.py
 
 from __future__ import annotations
-import os, time, csv
-from collections import deque
-from typing import Optional, Tuple
+import os, time, threading, queue
+from typing import Optional
 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
@@ -28,9 +27,11 @@ from tkinter.scrolledtext import ScrolledText
 import winsound  # Windows sound API
 
 # --- Local modules ---
-from backend_winmm import AXIS_NAMES, Backend as WinMMBackend
+from backend_winmm import (AXIS_NAMES, ONE_EURO_MIN_CUTOFF, Backend as WinMMBackend,
+                           timeBeginPeriod, timeEndPeriod)
 from drills import DrillConfig, DrillEngine, StreakTracker, feedback_for
 from coach import load_settings, coach_advice
+from ring import RingSoA, SessionLog
 
 # ---- Paths (keep everything beside this file; works fine inside .venv) -----
 ROOT = os.path.dirname(os.path.abspath(__file__))
@@ -41,6 +42,135 @@ BEEP_PATH = os.path.join(ASSETS_DIR, 'beep.wav')
 for _p in (ASSETS_DIR, DATA_DIR, CONFIG_DIR):
     os.makedirs(_p, exist_ok=True)
 
+# Parks a canvas line out of view when there are not enough points to draw
+_OFFSCREEN_LINE = (-10, -10, -10, -10)
+
+# Device sampling runs on a worker thread at _SAMPLE_HZ (with the system
+# timer at 1 ms while it runs). On the Tk side a poll tick grades the new
+# samples; a separate paint tick, capped by the Max FPS setting, redraws only
+# when a sample arrived since the last paint.
+_SAMPLE_HZ = 1000
+_SAMPLE_PERIOD_S = 1.0 / _SAMPLE_HZ
+_RING_SECONDS = 300   # history kept in memory for the plot
+# Every sample of a run is also appended here, so CSV export is not capped
+# by the ring; rewritten on each Start. Capped at 2 h of samples (~170 MB);
+# a longer run exports its first 2 h.
+_SESSION_LOG = os.path.join(DATA_DIR, '.session.f64')
+_SESSION_LOG_MAX_ROWS = 2 * 3600 * _SAMPLE_HZ
+_POLL_TICK_MS = 8
+_MAX_FPS_DEFAULT = 60
+_AXIS_MONITOR_S = 0.2   # raw values refresh at 5 Hz; faster is unreadable
+_RAW_EVERY = 16         # sampler copies all six raw axes every N samples (~60 Hz)
+
+def _play_beep(wav: bytes) -> None:
+    try:
+        winsound.PlaySound(wav, winsound.SND_MEMORY | winsound.SND_NODEFAULT)
+    except Exception:
+        pass
+
+# NumPy is optional: when installed, trace coordinates are mapped with
+# vector ops over the ring's float arrays (zero-copy via the buffer protocol);
+# otherwise a plain loop does the same mapping.
+#
+# Either way, interior points of a horizontal run (same pixel y as both
+# neighbours) are dropped: they don't change the drawn line, and a pedal at
+# rest or held in the band produces long such runs, so Tk gets far fewer
+# points to rasterize on long windows.
+#
+# When the window holds more samples than the canvas has pixel columns, each
+# column is first reduced to its min and max y (in the order the trace moves
+# through them), so the polyline never has more than ~2 points per column.
+# Without NumPy the window is instead cut into fixed chunks of ~one column's
+# worth of samples and reduced in C (see _col_ys), so a 1 kHz ring stays
+# cheap to paint.
+try:
+    import numpy as np
+
+    def _flat_xy(xs, ys):
+        keep = np.ones(len(xs), bool)
+        keep[1:-1] = (ys[1:-1] != ys[:-2]) | (ys[1:-1] != ys[2:])
+        out = np.empty(2*int(np.count_nonzero(keep)), np.int32)
+        out[0::2] = xs[keep]; out[1::2] = ys[keep]
+        return out.tolist()
+
+    def _minmax_cols(ys, starts, ends):
+        lo = np.minimum.reduceat(ys, starts)
+        hi = np.maximum.reduceat(ys, starts)
+        up = ys[starts] <= ys[ends]
+        out = np.empty(2*len(starts), np.int32)
+        out[0::2] = np.where(up, lo, hi); out[1::2] = np.where(up, hi, lo)
+        return out
+
+    def _trace_xy(ts, bs, tbs, t_min_ms, kx, h, w):
+        xs = ((np.frombuffer(ts) - t_min_ms) * kx).astype(np.int32)
+        ybs = (h - np.frombuffer(bs)*h).astype(np.int32)
+        yts = (h - np.frombuffer(tbs)*h).astype(np.int32)
+        if len(xs) > 2*w:
+            # xs is non-decreasing, so each column is one contiguous run
+            starts = np.flatnonzero(np.r_[True, xs[1:] != xs[:-1]])
+            ends = np.r_[starts[1:], len(xs)] - 1
+            ybs = _minmax_cols(ybs, starts, ends)
+            yts = _minmax_cols(yts, starts, ends)
+            xs = np.repeat(xs[starts], 2)
+        return _flat_xy(xs, ybs), _flat_xy(xs, yts)
+except ImportError:
+    def _flat_xy(xs, ys):
+        # walk (x, y, next y) with zip and carry the previous y, so the loop
+        # body does no indexing
+        out = [xs[0], ys[0]]
+        prev = ys[0]
+        for x, y, nxt in zip(xs[1:-1], ys[1:-1], ys[2:]):
+            if y != prev or y != nxt:
+                out += (x, y)
+            prev = y
+        out += (xs[-1], ys[-1])
+        return out
+
+    def _col_ys(vs, k, m, h):
+        # min/max y of each k-sample chunk of vs[:m], plus the short tail
+        # chunk, in the order the trace moves through them. map(max, *parts)
+        # reduces all chunks in C: parts[o] holds every chunk's o-th sample.
+        parts = [vs[o:m:k] for o in range(k)]
+        out = []
+        for f, l, lo, hi in zip(parts[0], parts[-1], map(min, *parts), map(max, *parts)):
+            y_lo = int(h - hi*h); y_hi = int(h - lo*h)   # y falls as v rises
+            out += (y_lo, y_hi) if int(h - f*h) <= int(h - l*h) else (y_hi, y_lo)
+        if m < len(vs):
+            tail = vs[m:]
+            y_lo = int(h - max(tail)*h); y_hi = int(h - min(tail)*h)
+            out += (y_lo, y_hi) if int(h - tail[0]*h) <= int(h - tail[-1]*h) else (y_hi, y_lo)
+        return out
+
+    def _trace_xy(ts, bs, tbs, t_min_ms, kx, h, w):
+        n = len(ts)
+        if n <= 2*w:
+            xs = [int((t - t_min_ms) * kx) for t in ts]
+            return (_flat_xy(xs, [int(h - b*h) for b in bs]),
+                    _flat_xy(xs, [int(h - tb*h) for tb in tbs]))
+        # More samples than pixel columns: decimate before mapping. Stride
+        # through the window in chunks of ~one column's worth of samples and
+        # keep each chunk's min and max, so the Python-level work scales with
+        # the canvas width rather than the sample count.
+        k = -(-n // w)            # samples per chunk (>= 3 here)
+        m = n - n % k             # samples in whole chunks
+        cx = []
+        for t in ts[0:m:k]:
+            x = int((t - t_min_ms) * kx)
+            cx += (x, x)
+        if m < n:
+            x = int((ts[m] - t_min_ms) * kx)
+            cx += (x, x)
+        return _flat_xy(cx, _col_ys(bs, k, m, h)), _flat_xy(cx, _col_ys(tbs, k, m, h))
+
+# CSV export layout (matches csv.writer's default \r\n line terminator)
+_CSV_HEADER = 'time_ms,brake,throttle\r\n'
+_CSV_ROW = '%d,%.4f,%.4f\r\n'
+
+# Coach summary line, filled from session_stats (+ the formatted averages)
+_SUMMARY_TMPL = ('Reps: {reps} · Avg TTB: {ttb} · Avg release: {rel} · '
+                 'Overshoots: {overshoots} · Early corrections: {early_corrections} · '
+                 'Oscillations: {oscillations} · Release bumps: {release_bumps}')
+
 # ---- UI --------------------------------------------------------------------
 class App(tk.Tk):
     def __init__(self):
@@ -65,16 +195,46 @@ class App(tk.Tk):
             "oscillations": 0,
             "reps": 0,
         }
-        self._ttb_accum = []
-        self._rel_accum = []
+        # Running means for the session averages: (count, mean), O(1) per rep
+        self._ttb_n = 0; self._ttb_mean = 0.0
+        self._rel_n = 0; self._rel_mean = 0.0
         self._last_feedback = ""
 
-        # Plot buffer
-        self.buffer = deque(maxlen=120*60*5)
+        # Pass beep, read once so a pass doesn't hit the disk
+        self._beep_bytes: Optional[bytes] = None
+        if os.path.isfile(BEEP_PATH):
+            try:
+                with open(BEEP_PATH, 'rb') as f:
+                    self._beep_bytes = f.read()
+            except OSError:
+                pass
+
+        # Plot buffer; the sampler thread is its only writer
+        self._ring = RingSoA(_RING_SECONDS * _SAMPLE_HZ)
+        self._graded = 0            # ring.total already fed to the drill engine
+        self._log = SessionLog(_SESSION_LOG, _SESSION_LOG_MAX_ROWS)
+        self._exporting = False     # a CSV export is running
+        self._saved_total = 0       # ring.total covered by the last successful export
+        # Export worker -> Tk thread: (callable, args) to run on the Tk side,
+        # drained by _export_tick (Tk calls are not thread-safe)
+        self._export_q: queue.SimpleQueue = queue.SimpleQueue()
+
+        # Sampler thread: reads, filters and appends into the ring
+        self._sampler: Optional[threading.Thread] = None
+        self._running = False       # Tk ticks reschedule themselves while set
+        self._poll_after = None     # pending after() ids of those ticks
+        self._paint_after = None
+        self._sample_stop: Optional[threading.Event] = None
+        self._latest = None         # newest processed sample, for the paint tick
+        self._last_drawn_t = -1.0   # its t_ms when last painted
+        self._paint_ms = 1000 // _MAX_FPS_DEFAULT
 
         # Popup refs
         self.axis_popup = None
         self.axis_tree = None
+        self._axis_rows = ()  # Treeview iids, one per AXIS_NAMES entry
+        self._axis_shown_at = 0.0   # perf_counter() of the last monitor refresh
+        self._axis_vals = ()        # raw values currently shown in those rows
 
         self._build_ui()
         self.refresh()
@@ -87,32 +247,48 @@ class App(tk.Tk):
         ttk.Label(top, text='Device ID:').grid(row=0,column=0,sticky='w')
         self.dev_combo = ttk.Combobox(top, state='readonly', width=20)
         self.dev_combo.grid(row=0,column=1,sticky='w')
-        ttk.Button(top, text='Refresh', command=self.refresh).grid(row=0,column=2,padx=6)
+        ttk.Button(top, text='Refresh', command=lambda: self.refresh(rescan=True)).grid(row=0,column=2,padx=6)
         ttk.Button(top, text='Open', command=self.apply_device).grid(row=0,column=3,padx=6)
 
         ttk.Label(top, text='Brake axis').grid(row=1,column=0,sticky='w')
         self.br_combo = ttk.Combobox(top, state='readonly', width=10, values=AXIS_NAMES)
         self.br_combo.set(getattr(self.backend, 'axis_brake', 'Y'))
         self.br_combo.grid(row=1,column=1,sticky='w')
+        self.br_combo.bind('<<ComboboxSelected>>', lambda _e: self._sync_axis('axis_brake', self.br_combo))
         self.br_inv = tk.BooleanVar(value=getattr(self.backend.cfg_b, 'invert', False))
-        ttk.Checkbutton(top, text='Invert', variable=self.br_inv, command=self.apply_axes).grid(row=1,column=2,sticky='w')
+        ttk.Checkbutton(top, text='Invert', variable=self.br_inv).grid(row=1,column=2,sticky='w')
 
         ttk.Label(top, text='Throttle axis').grid(row=2,column=0,sticky='w')
         self.th_combo = ttk.Combobox(top, state='readonly', width=10, values=AXIS_NAMES)
         self.th_combo.set(getattr(self.backend, 'axis_thr', 'X'))
         self.th_combo.grid(row=2,column=1,sticky='w')
+        self.th_combo.bind('<<ComboboxSelected>>', lambda _e: self._sync_axis('axis_thr', self.th_combo))
         self.th_inv = tk.BooleanVar(value=getattr(self.backend.cfg_t, 'invert', False))
-        ttk.Checkbutton(top, text='Invert', variable=self.th_inv, command=self.apply_axes).grid(row=2,column=2,sticky='w')
+        ttk.Checkbutton(top, text='Invert', variable=self.th_inv).grid(row=2,column=2,sticky='w')
 
         ttk.Label(top, text='Deadzone').grid(row=3,column=0,sticky='w')
         self.dz = tk.DoubleVar(value=getattr(self.backend.cfg_b, 'deadzone', 0.02))
-        ttk.Spinbox(top, from_=0.0, to=0.2, increment=0.005, textvariable=self.dz, width=7, command=self.apply_axes).grid(row=3,column=1,sticky='w')
-        ttk.Label(top, text='Smoothing (ms)').grid(row=3,column=2,sticky='w')
-        self.sm = tk.IntVar(value=20)
-        ttk.Spinbox(top, from_=0, to=200, increment=5, textvariable=self.sm, width=7, command=self.apply_axes).grid(row=3,column=3,sticky='w')
+        ttk.Spinbox(top, from_=0.0, to=0.2, increment=0.005, textvariable=self.dz, width=7).grid(row=3,column=1,sticky='w')
+        ttk.Label(top, text='Min cutoff (Hz)').grid(row=3,column=2,sticky='w')
+        self.sm = tk.DoubleVar(value=ONE_EURO_MIN_CUTOFF)  # One Euro filter; 0 = off
+        ttk.Spinbox(top, from_=0, to=50, increment=0.5, textvariable=self.sm, width=7).grid(row=3,column=3,sticky='w')
         ttk.Label(top, text='Window (s)').grid(row=3,column=4,sticky='w')
         self.win = tk.DoubleVar(value=8.0)
         ttk.Spinbox(top, from_=2, to=30, increment=1, textvariable=self.win, width=7).grid(row=3,column=5,sticky='w')
+        ttk.Label(top, text='Max FPS').grid(row=3,column=6,sticky='w')
+        self.max_fps = tk.IntVar(value=_MAX_FPS_DEFAULT)
+        ttk.Spinbox(top, from_=10, to=120, increment=10, textvariable=self.max_fps, width=7).grid(row=3,column=7,sticky='w')
+
+        # Plain-Python mirrors of the settings vars, so the run/draw path never
+        # round-trips through Tcl to read them; each edit pushes only its own
+        # field to the backend
+        self._mirror(self.br_inv, '_br_inv', bool, self._sync_br_inv)
+        self._mirror(self.th_inv, '_th_inv', bool, self._sync_th_inv)
+        self._mirror(self.dz, '_dz', float, self._sync_dz)
+        self._mirror(self.sm, '_min_cutoff_hz', float, self._sync_sm)
+        # plot window in ms (min 2 s), converted once per edit rather than per frame
+        self._mirror(self.win, '_win_ms', lambda v: max(2.0, float(v)) * 1000.0)
+        self._mirror(self.max_fps, '_max_fps', int, self._sync_max_fps)
 
         # Actions
         ttk.Button(top, text='Calibrate zero', command=self.calibrate).grid(row=4,column=0,pady=6,sticky='w')
@@ -134,9 +310,22 @@ class App(tk.Tk):
 
         self.canvas = tk.Canvas(left, bg='#0a0f19', highlightthickness=0, height=460)
         self.canvas.pack(fill=tk.BOTH, expand=True)
+        # Plot items are created once (stacked grid < brake % < traces); the
+        # grid is laid out on <Configure>, the rest is moved/updated by _draw
+        cv = self.canvas
+        self.grid_lines = [cv.create_line(_OFFSCREEN_LINE, fill='#162033') for _ in range(11)]
+        self.pct_text = cv.create_text(-10, -10, text='', anchor='ne', fill='#e6eefc', font=('Segoe UI', 14, 'bold'))
+        self.brake_line = cv.create_line(_OFFSCREEN_LINE, fill='#48a0ff', width=2)
+        self.thr_line = cv.create_line(_OFFSCREEN_LINE, fill='#7cdb6f', width=2)
+        self._plot_size = (1000, 360)  # canvas (w, h) as of the last <Configure>
+        cv.bind('<Configure>', self._on_resize)
+        self._shown_pct = None  # brake % currently in pct_text (None = blank)
         self.debug = ttk.Label(left, text='', foreground='#93a0b3')
         self.debug.pack(anchor='w', padx=4, pady=(4,6))
 
+        # Per-rep feedback: a plain label, cheap to update on every rep
+        self.feedback_var = tk.StringVar(value='')
+        ttk.Label(right, textvariable=self.feedback_var, wraplength=300, justify='left').pack(anchor='w', fill=tk.X, pady=(0,6))
         ttk.Label(right, text='Coach', font=('Segoe UI', 11, 'bold')).pack(anchor='w')
         self.coach_out = ScrolledText(right, height=20, wrap=tk.WORD)
         self.coach_out.pack(fill=tk.BOTH, expand=True)
@@ -149,9 +338,9 @@ class App(tk.Tk):
             pass
 
     # -- Device mgmt ---------------------------------------------------------
-    def refresh(self):
+    def refresh(self, rescan: bool = False):
         try:
-            ids = self.backend.list_devices()
+            ids = self.backend.rescan_devices() if rescan else self.backend.list_devices()
         except Exception as e:
             messagebox.showerror('Backend error', f'list_devices failed: {e}')
             ids = []
@@ -168,27 +357,82 @@ class App(tk.Tk):
             messagebox.showwarning('No device','Pick a device ID first.')
             return
         did = int(s)
+        if self._exporting:
+            messagebox.showwarning('Saving', 'Wait for the CSV export to finish.')
+            return
+        # The sampler owns the device handle and the ring while it runs
+        was_running = self._sampler is not None
+        if not was_running and did == getattr(self.backend, 'dev_id', None):
+            # Nothing to reopen; keep the finished session for export
+            messagebox.showinfo('Opened', f'Using WinMM device ID {did}')
+            return
+        # Reopening restarts the backend clock, so the recorded samples have
+        # to go (the ring must stay time-ordered for RingSoA.since())
+        if self._ring.total > self._saved_total and not messagebox.askyesno(
+                'Unsaved data', 'Opening the device clears the current trace, '
+                'which has not been saved. Continue?'):
+            return
+        if not self._stop_sampler():
+            self._sampler_stuck(); return
         try:
             self.backend.apply_device(did)
         except AttributeError:
             self.backend.dev_id = did
         except Exception as e:
+            if was_running:
+                self._start_sampler()
             messagebox.showerror('Open failed', str(e)); return
+        self._ring_clear()
+        if self.drill is not None:
+            # a rep in progress would see time jump backwards
+            self.drill = DrillEngine(self.drill_cfg)
+        if was_running:
+            self._start_sampler()
         messagebox.showinfo('Opened', f'Using WinMM device ID {did}')
 
-    def apply_axes(self):
-        self.backend.axis_brake = self.br_combo.get()
-        self.backend.axis_thr   = self.th_combo.get()
+    def _mirror(self, var, attr, conv, on_change=None):
+        # Keep self.<attr> == conv(var.get()); a half-typed entry keeps the last good value
+        def sync(*_):
+            try:
+                value = conv(var.get())
+            except (tk.TclError, ValueError):
+                return
+            setattr(self, attr, value)
+            if on_change is not None:
+                on_change(value)
+        var.trace_add('write', sync)
+        sync()
+
+    # Per-widget backend sync: each edit writes only the field it owns
+    def _sync_axis(self, attr, combo):
         try:
-            self.backend.cfg_b.invert = bool(self.br_inv.get())
-            self.backend.cfg_t.invert = bool(self.th_inv.get())
-            dz = float(self.dz.get())
-            self.backend.cfg_b.deadzone = dz
-            self.backend.cfg_t.deadzone = dz
-            self.backend.set_smoothing(float(self.sm.get()))
+            setattr(self.backend, attr, combo.get())
         except Exception:
             pass
 
+    def _sync_br_inv(self, inv):
+        self.backend.cfg_b.invert = inv
+        self.backend.cfg_b.recompute()
+
+    def _sync_th_inv(self, inv):
+        self.backend.cfg_t.invert = inv
+        self.backend.cfg_t.recompute()
+
+    def _sync_dz(self, dz):
+        for cfg in (self.backend.cfg_b, self.backend.cfg_t):
+            cfg.deadzone = dz
+            cfg.recompute()
+
+    def _sync_sm(self, hz):
+        try:
+            self.backend.set_filter(hz)
+        except Exception:
+            pass
+
+    def _sync_max_fps(self, fps):
+        # Only the paint cadence changes; sampling and grading keep their rate
+        self._paint_ms = max(1, 1000 // max(1, fps))
+
     def calibrate(self):
         try:
             zb, zt = self.backend.calibrate_zero()
@@ -198,8 +442,16 @@ class App(tk.Tk):
 
     # -- Run/plot ------------------------------------------------------------
     def start(self):
-        # Reset plot + drill state
-        self.buffer.clear()
+        if self._exporting:
+            return   # Start stays disabled until _export_done
+        # Reset plot + drill state. A tick still pending from a quick
+        # Stop/Start would otherwise see _running set and keep a second
+        # chain alive next to the new one.
+        self._cancel_ticks()
+        if not self._stop_sampler():
+            self._sampler_stuck(); return
+        self._ring_clear()
+        self._running = True
         self.btn_start.config(state=tk.DISABLED)
         self.btn_stop.config(state=tk.NORMAL)
 
@@ -214,140 +466,286 @@ class App(tk.Tk):
             "oscillations": 0,
             "reps": 0,
         })
-        self._ttb_accum.clear(); self._rel_accum.clear(); self._last_feedback = ""
+        self._ttb_n = 0; self._ttb_mean = 0.0
+        self._rel_n = 0; self._rel_mean = 0.0
+        self._last_feedback = ""; self.feedback_var.set("")
 
         # Reset backend filters
         try:
-            self.backend.set_smoothing(float(self.sm.get()))
+            self.backend.set_filter(self._min_cutoff_hz)
         except Exception:
             pass
 
-        self._loop()
+        # Fresh queue + stop flag per run, so a sampler still winding down
+        # from a previous run can't feed this one
+        self._start_sampler()
+
+        self._latest = None; self._last_drawn_t = -1.0
+        self._poll_tick()
+        self._paint_tick()
 
     def stop(self):
-        self.btn_start.config(state=tk.NORMAL)
+        self._running = False
+        self._cancel_ticks()
+        self._stop_sampler()
+        self._poll_tick()   # grade/log what the sampler added before it stopped
+        if not self._exporting:
+            self.btn_start.config(state=tk.NORMAL)
         self.btn_stop.config(state=tk.DISABLED)
 
     def save_csv(self):
-        if not self.buffer:
+        if not self._ring.total:
+            return
+        if self._exporting:
+            messagebox.showinfo('Saving', 'A CSV export is already running.')
             return
         path = filedialog.asksaveasfilename(defaultextension='.csv', filetypes=[('CSV','*.csv')], initialfile='pedal_trace.csv')
         if not path:
             return
-        with open(path,'w',newline='') as f:
-            w=csv.writer(f); w.writerow(['time_ms','brake','throttle'])
-            for t,b,tb in self.buffer: w.writerow([int(t), f'{b:.4f}', f'{tb:.4f}'])
-
-    def _loop(self):
-        # Update popup axis monitor if open
-        vals = None
+        # Export the whole session from the disk log when there is one, else
+        # snapshot the ring here (array slices are copies). Reading, formatting
+        # and writing happen on a worker thread so the UI keeps sampling.
+        # Appends past log.rows don't disturb the reader, but a reset would
+        # truncate the file under it: Start and device changes wait for
+        # _export_done.
+        log = self._log
+        if log.rows:
+            log.flush()
+            blocks = SessionLog.read_blocks(log.path, log.rows)
+        else:
+            blocks = (self._ring.ordered(),)
+        self._exporting = True
+        self.btn_start.config(state=tk.DISABLED)
+        total = self._ring.total
+        threading.Thread(target=self._write_csv, args=(path, blocks, total), daemon=True).start()
+        self._export_tick()
+
+    def _write_csv(self, path, blocks, total):
+        # Worker thread. Each block is formatted in one C-level pass and
+        # written before the next is read, so memory stays at one block.
+        post = self._export_q.put
         try:
-            vals = self.backend.read_raw(getattr(self.backend, 'dev_id', 0))
-        except Exception:
-            pass
-        if self.axis_tree is not None and self.axis_tree.winfo_exists():
-            self.axis_tree.delete(*self.axis_tree.get_children())
-            if vals:
-                for name, v in zip(AXIS_NAMES, vals):
-                    self.axis_tree.insert('', 'end', values=(name, v))
-
-        # Plot + drill engine
-        sample = None
+            with open(path,'w',newline='') as f:
+                f.write(_CSV_HEADER)
+                for cols in blocks:
+                    f.write(''.join(map(_CSV_ROW.__mod__, zip(*cols))))
+            post((self._export_saved, (total,)))
+        except Exception as e:
+            post((messagebox.showerror, ('Save failed', str(e))))
+        finally:
+            post((self._export_done, ()))
+
+    def _export_tick(self):
+        # Run whatever the export worker posted; poll until it reports done
+        q = self._export_q
+        while not q.empty():
+            fn, args = q.get()
+            fn(*args)
+        if self._exporting:
+            self.after(50, self._export_tick)
+
+    def _export_saved(self, total):
+        # Apply Device only asks before dropping samples past this count
+        self._saved_total = total
+
+    def _export_done(self):
+        self._exporting = False
+        if not self._running:
+            self.btn_start.config(state=tk.NORMAL)
+
+    def _ring_clear(self):
+        # Only while the sampler is stopped
+        self._ring.clear()
+        self._graded = 0
+        self._saved_total = 0
+        self._log.reset()
+
+    def _start_sampler(self):
+        if not self._stop_sampler():
+            return   # never run two samplers into one ring
+        self._sample_stop = stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample_worker, args=(stop,), daemon=True)
+        self._sampler.start()
+
+    def _stop_sampler(self):
+        """Stop and join the sampler, so nothing is still writing the ring
+        when the caller resets it. False if the thread outlived the join
+        timeout (e.g. stuck in a driver call); it is kept in self._sampler and
+        the caller must leave the ring alone."""
+        if self._sample_stop is not None:
+            self._sample_stop.set()
+        if self._sampler is not None:
+            self._sampler.join(0.5)
+            if self._sampler.is_alive():
+                return False
+            self._sampler = None
+        return True
+
+    def _sampler_stuck(self):
+        messagebox.showerror('Sampler busy',
+                             'The sampling thread has not stopped yet; try again in a moment.')
+
+    def _sample_worker(self, stop):
+        """Sampler thread: read the device every _SAMPLE_PERIOD_S, filter it and
+        append it to the ring. The Tk side only grades and paints what it finds."""
+        backend = self.backend
+        step = backend.step; push = self._ring.push
+        clock = time.perf_counter_ns; period_ns = int(_SAMPLE_PERIOD_S * 1e9)
+        # The full raw axes are only shown (debug line, Axis Monitor), so they
+        # are copied every _RAW_EVERY samples; in between only the two pedal
+        # axes are read
+        raw = None; n = 0
+        timeBeginPeriod(1)
         try:
-            sample = self.backend.poll()
-        except Exception:
-            pass
-        if sample:
-            t,b,tb,raw = sample
-            self.buffer.append((t,b,tb))
-            self._draw()
-            self.debug.config(text=f'Brake: {b:.3f}   Throttle: {tb:.3f}   Raw: {raw}')
-
-            # Drill grading
+            deadline = clock()
+            while not stop.is_set():
+                try:
+                    sample = step(n == 0)
+                    if sample is not None:
+                        t, b, tb, r = sample
+                        push(t, b, tb)
+                        if r is not None:
+                            raw = r
+                        self._latest = (t, b, tb, raw)
+                        n = (n + 1) % _RAW_EVERY
+                except Exception:
+                    pass
+                deadline += period_ns
+                delay = deadline - clock()
+                if delay > 0:
+                    time.sleep(delay * 1e-9)
+                else:
+                    deadline = clock()  # fell behind; don't try to catch up in a burst
+        finally:
+            timeEndPeriod(1)
+
+    def _poll_tick(self):
+        # Grade what the sampler appended since the last tick; the drill engine
+        # sees every sample, not just the painted ones
+        ring = self._ring
+        total = ring.total
+        k = max(self._graded, total - ring.cap)
+        if k < total:
+            ts, bs, tbs = ring.run(k, total)
+            self._log.append(ts, bs, tbs)
+            # One call for the whole run; only the (rare) events come back
             if self.drill is not None:
-                events = self.drill.update(t_ms=t, b=b)
-                for ev in events:
+                for ev in self.drill.update_batch(ts, bs):
                     if ev.get('type') == 'rep_complete':
-                        m = ev['metrics']
-                        passed = ev['passed']
-                        self.streak.note_rep(t_ms=t, passed=passed)
-                        self.streak_label.config(text=f"Streak {self.streak.streak}/{self.streak.goal}")
-
-                        # Aggregates
-                        self.session_stats["reps"] += 1
-                        if m.get("ttb_ms") is not None:
-                            self._ttb_accum.append(m["ttb_ms"])
-                            self.session_stats["avg_ttb_ms"] = sum(self._ttb_accum)/len(self._ttb_accum)
-                        if m.get("release_ms") is not None:
-                            self._rel_accum.append(m["release_ms"])
-                            self.session_stats["avg_release_ms"] = sum(self._rel_accum)/len(self._rel_accum)
-                        if (m.get("overshoot_pct") or 0) > 0:
-                            self.session_stats["overshoots"] += 1
-                        if m.get("early_correction"):
-                            self.session_stats["early_corrections"] += 1
-                        if m.get("release_bump"):
-                            self.session_stats["release_bumps"] += 1
-                        self.session_stats["oscillations"] += int(m.get("oscillations") or 0)
-
-                        # Per-rep feedback
-                        fb = feedback_for(m, self.drill_cfg)
-                        rep_no = self.session_stats["reps"]
-                        verdict = "PASS ✅" if passed else "FAIL ⚠️"
-                        self._last_feedback = (
-                            f"Rep {rep_no}: {verdict} · "
-                            f"TTB {m.get('ttb_ms') and int(m['ttb_ms'])} ms · "
-                            f"Rel {m.get('release_ms') and int(m['release_ms'])} ms\n{fb}"
-                        )
-                        # Show feedback immediately
-                        self.coach_out.config(state='normal')
-                        self.coach_out.delete('1.0', 'end')
-                        self.coach_out.insert('end', self._last_feedback)
-                        self.coach_out.config(state='disabled')
-
-                        # Beep on pass
-                        if passed and os.path.isfile(BEEP_PATH):
-                            try:
-                                winsound.PlaySound(BEEP_PATH, winsound.SND_FILENAME | winsound.SND_ASYNC)
-                            except Exception:
-                                pass
+                        self._on_rep_complete(ev, ev['t_ms'])
+        self._graded = total
 
         # Keep looping while running
-        if str(self.btn_stop['state']) == 'normal':
-            self.after(8, self._loop)
+        self._poll_after = self.after(_POLL_TICK_MS, self._poll_tick) if self._running else None
+
+    def _paint_tick(self):
+        # Repaint only if the sampler produced something new since last time
+        sample = self._latest
+        if sample is not None and sample[0] != self._last_drawn_t:
+            self._last_drawn_t = sample[0]
+            t,b,tb,raw = sample
+
+            # Update popup axis monitor if open
+            now = time.perf_counter()
+            if (now - self._axis_shown_at >= _AXIS_MONITOR_S
+                    and self.axis_tree is not None and self.axis_tree.winfo_exists()):
+                self._axis_shown_at = now
+                if raw != self._axis_vals:
+                    # only rows whose value moved go through Tcl
+                    item = self.axis_tree.item
+                    for iid, name, v, old in zip(self._axis_rows, AXIS_NAMES, raw, self._axis_vals):
+                        if v != old:
+                            item(iid, values=(name, v))
+                    self._axis_vals = raw
+
+            self._draw()
+            self.debug.config(text=f'Brake: {b:.3f}   Throttle: {tb:.3f}   Raw: {raw}')
+
+        self._paint_after = self.after(self._paint_ms, self._paint_tick) if self._running else None
+
+    def _cancel_ticks(self):
+        for attr in ('_poll_after', '_paint_after'):
+            after_id = getattr(self, attr)
+            if after_id is not None:
+                self.after_cancel(after_id)
+                setattr(self, attr, None)
+
+    def _on_rep_complete(self, ev, t):
+        m = ev['metrics']
+        passed = ev['passed']
+        self.streak.note_rep(t_ms=t, passed=passed)
+        self.streak_label.config(text=f"Streak {self.streak.streak}/{self.streak.goal}")
+
+        # Aggregates
+        self.session_stats["reps"] += 1
+        if m.get("ttb_ms") is not None:
+            self._ttb_n += 1
+            self._ttb_mean += (m["ttb_ms"] - self._ttb_mean) / self._ttb_n
+            self.session_stats["avg_ttb_ms"] = self._ttb_mean
+        if m.get("release_ms") is not None:
+            self._rel_n += 1
+            self._rel_mean += (m["release_ms"] - self._rel_mean) / self._rel_n
+            self.session_stats["avg_release_ms"] = self._rel_mean
+        if (m.get("overshoot_pct") or 0) > 0:
+            self.session_stats["overshoots"] += 1
+        if m.get("early_correction"):
+            self.session_stats["early_corrections"] += 1
+        if m.get("release_bump"):
+            self.session_stats["release_bumps"] += 1
+        self.session_stats["oscillations"] += int(m.get("oscillations") or 0)
+
+        # Per-rep feedback
+        fb = feedback_for(m, self.drill_cfg)
+        rep_no = self.session_stats["reps"]
+        verdict = "PASS ✅" if passed else "FAIL ⚠️"
+        self._last_feedback = (
+            f"Rep {rep_no}: {verdict} · "
+            f"TTB {m.get('ttb_ms') and int(m['ttb_ms'])} ms · "
+            f"Rel {m.get('release_ms') and int(m['release_ms'])} ms\n{fb}"
+        )
+        # Show feedback immediately (coach_out is only written by on_coach)
+        self.feedback_var.set(self._last_feedback)
+
+        # Beep on pass. winsound can't play SND_MEMORY asynchronously, so the
+        # (blocking) in-memory play runs on a short-lived thread instead.
+        if passed and self._beep_bytes:
+            threading.Thread(target=_play_beep, args=(self._beep_bytes,), daemon=True).start()
 
     def _draw(self):
-        w = self.canvas.winfo_width() or 1000
-        h = self.canvas.winfo_height() or 360
-        self.canvas.delete('all')
-        # grid
-        for i in range(0,11):
-            y = h - int(h*(i/10))
-            self.canvas.create_line(0,y,w,y,fill='#162033')
-        # live brake % (top-right)
-        if self.buffer:
-            _, b_last, _ = self.buffer[-1]
-            pct = int(round(b_last*100))
-            self.canvas.create_text(w-10, 18, text=f'{pct}%', anchor='ne', fill='#e6eefc', font=('Segoe UI', 14, 'bold'))
-        # traces
-        if not self.buffer:
+        w, h = self._plot_size
+        cv = self.canvas
+        # live brake % (top-right); only touch the item when the number changes
+        latest = self._ring.latest()
+        pct = int(round(latest[1]*100)) if latest else None
+        if pct != self._shown_pct:
+            cv.itemconfigure(self.pct_text, text='' if pct is None else f'{pct}%')
+            self._shown_pct = pct
+        # traces: one polyline per pedal over the visible window
+        coords = cv.coords
+        if latest is None:
+            coords(self.brake_line, _OFFSCREEN_LINE)
+            coords(self.thr_line, _OFFSCREEN_LINE)
             return
-        t_now = self.buffer[-1][0]/1000.0
-        T = max(2.0, float(self.win.get()))
-        t_min = max(0.0, t_now - T)
-        def x_at(tms): return int(((tms/1000.0 - t_min)/T) * w)
-        def y_at(v): return int(h - v*h)
-        last=None
-        for t,b,_ in self.buffer:
-            if t/1000.0 < t_min: continue
-            pt=(x_at(t), y_at(b))
-            if last: self.canvas.create_line(last[0],last[1],pt[0],pt[1], fill='#48a0ff', width=2)
-            last=pt
-        last=None
-        for t,_,tb in self.buffer:
-            if t/1000.0 < t_min: continue
-            pt=(x_at(t), y_at(tb))
-            if last: self.canvas.create_line(last[0],last[1],pt[0],pt[1], fill='#7cdb6f', width=2)
-            last=pt
+        t_now_ms = latest[0]
+        T_ms = self._win_ms
+        t_min_ms = max(0.0, t_now_ms - T_ms)
+        ts, bs, tbs = self._ring.since(t_min_ms)
+        if len(ts) < 2:
+            brake_xy = thr_xy = _OFFSCREEN_LINE
+        else:
+            brake_xy, thr_xy = _trace_xy(ts, bs, tbs, t_min_ms, w / T_ms, h, w)
+        coords(self.brake_line, brake_xy)
+        coords(self.thr_line, thr_xy)
+
+    def _on_resize(self, event):
+        # grid + brake % position only depend on the canvas size
+        w, h = event.width or 1000, event.height or 360
+        cv = self.canvas
+        for i, item in enumerate(self.grid_lines):
+            y = h - int(h*(i/10))
+            cv.coords(item, 0, y, w, y)
+        cv.coords(self.pct_text, w-10, 18)
+        self._plot_size = (w, h)
 
     # -- Axis monitor popup --------------------------------------------------
     def toggle_axis_popup(self):
@@ -368,19 +766,21 @@ class App(tk.Tk):
         self.axis_tree.heading('axis', text='Axis');   self.axis_tree.column('axis', width=80, anchor='w')
         self.axis_tree.heading('value', text='Value'); self.axis_tree.column('value', width=160, anchor='w')
         self.axis_tree.pack(fill=tk.BOTH, expand=True, padx=8, pady=(0,8))
-        # First fill
+        # First fill; rows are created once and then updated in place
+        vals = None
         try:
             vals = self.backend.read_raw(getattr(self.backend, 'dev_id', 0))
-            if vals:
-                for name, v in zip(AXIS_NAMES, vals):
-                    self.axis_tree.insert('', 'end', values=(name, v))
         except Exception:
             pass
+        vals = tuple(vals or ('',)*len(AXIS_NAMES))
+        self._axis_rows = tuple(self.axis_tree.insert('', 'end', values=(name, v))
+                                for name, v in zip(AXIS_NAMES, vals))
+        self._axis_vals = vals
 
     # -- Coach panel ---------------------------------------------------------
     def on_coach(self):
         # Need at least some samples
-        if not self.buffer:
+        if not self._ring.total:
             self.coach_out.config(state='normal')
             self.coach_out.delete('1.0', 'end')
             self.coach_out.insert('end', 'No data yet. Press Start and perform a few reps, then click Coach.')
@@ -389,19 +789,12 @@ class App(tk.Tk):
 
         # Build a compact summary from current session stats
         ss = self.session_stats
-        rep_ct = ss.get("reps", 0)
-        avg_ttb = ss.get("avg_ttb_ms")
-        avg_rel = ss.get("avg_release_ms")
-        summary = [
-            f"Reps: {rep_ct}",
-            f"Avg TTB: {int(avg_ttb)} ms" if avg_ttb is not None else "Avg TTB: n/a",
-            f"Avg release: {int(avg_rel)} ms" if avg_rel is not None else "Avg release: n/a",
-            f"Overshoots: {ss.get('overshoots',0)}",
-            f"Early corrections: {ss.get('early_corrections',0)}",
-            f"Oscillations: {ss.get('oscillations',0)}",
-            f"Release bumps: {ss.get('release_bumps',0)}",
-        ]
-        summary_text = " · ".join(summary)
+        avg_ttb = ss["avg_ttb_ms"]
+        avg_rel = ss["avg_release_ms"]
+        summary_text = _SUMMARY_TMPL.format_map(dict(
+            ss,
+            ttb=f"{int(avg_ttb)} ms" if avg_ttb is not None else "n/a",
+            rel=f"{int(avg_rel)} ms" if avg_rel is not None else "n/a"))
 
         cfg_dict = {
             "target_pct": self.drill_cfg.target_pct,
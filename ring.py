@@ -0,0 +1,159 @@
+"""
+Sample storage for Pedal Trace (modular).
+
+Pure data structures (no UI, no device). RingSoA holds the last few minutes
+of (time_ms, brake, throttle) in preallocated parallel arrays, so a long
+session costs no allocation or GC churn after startup; SessionLog appends
+every sample of a run to disk for export.
+
+Usage from UI loop:
+    ring = RingSoA(300 * 1000)          # 5 minutes at 1 kHz
+    ring.push(t_ms, brake01, thr01)     # sampler thread
+    ts, bs, tbs = ring.since(t_ms - 8000.0)   # Tk thread: visible window
+"""
+from __future__ import annotations
+from array import array
+from bisect import bisect_left
+from typing import Optional
+
+class RingSoA:
+    """Fixed-capacity ring of parallel float arrays (time_ms, brake, throttle).
+
+    One thread may push() while others read: a slot is written before the
+    monotonic `total` count is advanced, and readers derive (count, head)
+    from a single read of `total`, so no lock is needed. clear() must only
+    run while nothing is pushing.
+    """
+    __slots__ = ('cap', 't', 'b', 'tb', 'total')
+
+    def __init__(self, cap: int):
+        self.cap = cap
+        self.t = array('d', bytes(8*cap))
+        self.b = array('d', bytes(8*cap))
+        self.tb = array('d', bytes(8*cap))
+        self.total = 0   # samples ever pushed
+
+    def push(self, t, b, tb):
+        total = self.total
+        i = total % self.cap
+        self.t[i] = t; self.b[i] = b; self.tb[i] = tb
+        self.total = total + 1
+
+    def clear(self):
+        self.total = 0
+
+    def span(self):
+        """(count, head) from a single read of the published total."""
+        total = self.total
+        return min(total, self.cap), total % self.cap
+
+    def latest(self):
+        """Newest (time_ms, brake, throttle), or None when empty."""
+        total = self.total
+        if not total:
+            return None
+        i = (total - 1) % self.cap
+        return self.t[i], self.b[i], self.tb[i]
+
+    def run(self, k, total):
+        """(time_ms, brake, throttle) arrays for samples number k..total-1,
+        which must still be in the ring (total - k <= cap)."""
+        cap = self.cap
+        i, j = k % cap, total % cap
+        t, b, tb = self.t, self.b, self.tb
+        if i < j:
+            return t[i:j], b[i:j], tb[i:j]
+        return t[i:] + t[:j], b[i:] + b[:j], tb[i:] + tb[:j]
+
+    def ordered(self):
+        """Return the (time_ms, brake, throttle) arrays oldest-first."""
+        n, h = self.span()
+        if n < self.cap:
+            return self.t[:n], self.b[:n], self.tb[:n]
+        return (self.t[h:] + self.t[:h],
+                self.b[h:] + self.b[:h],
+                self.tb[h:] + self.tb[:h])
+
+    def since(self, t_min_ms):
+        """Like ordered(), but only samples at or after t_min_ms.
+        The ring is time-sorted, so the start is found by bisection and only
+        the visible window is copied."""
+        (n, h), cap = self.span(), self.cap
+        t, b, tb = self.t, self.b, self.tb
+        if h == n or h == 0:
+            # not wrapped (or wrapped exactly at the end): one sorted run [0:n]
+            i = bisect_left(t, t_min_ms, 0, n)
+            return t[i:n], b[i:n], tb[i:n]
+        # wrapped: [h:cap] holds the older samples, [0:h] the newer ones
+        if t_min_ms > t[cap-1]:
+            i = bisect_left(t, t_min_ms, 0, h)
+            return t[i:h], b[i:h], tb[i:h]
+        i = bisect_left(t, t_min_ms, h, cap)
+        return t[i:] + t[:h], b[i:] + b[:h], tb[i:] + tb[:h]
+
+class SessionLog:
+    """Append-only disk copy of a run: native doubles, (time_ms, brake,
+    throttle) interleaved per row, 24 bytes each. A crash leaves everything up
+    to the last flush on disk.
+
+    The file is capped at max_rows (None = unbounded); once full, further
+    rows are dropped, so the log holds the first max_rows of the run.
+
+    Use from one thread only. If the file cannot be opened the log stays disabled
+    (rows == 0) and callers fall back to the ring. reset() truncates the file,
+    so it must not run while something is still reading it.
+    """
+    __slots__ = ('path', 'max_rows', 'rows', '_f')
+
+    def __init__(self, path: str, max_rows: Optional[int] = None):
+        self.path = path
+        self.max_rows = max_rows
+        self.rows = 0
+        self._f = None
+
+    def reset(self):
+        self.close()
+        self.rows = 0
+        try:
+            self._f = open(self.path, 'wb')
+        except OSError:
+            self._f = None
+
+    def append(self, ts, bs, tbs):
+        if self._f is None:
+            return
+        n = len(ts)
+        if self.max_rows is not None and self.rows + n > self.max_rows:
+            n = self.max_rows - self.rows
+            if n <= 0:
+                return
+            ts, bs, tbs = ts[:n], bs[:n], tbs[:n]
+        buf = array('d', bytes(24*n))
+        buf[0::3] = ts; buf[1::3] = bs; buf[2::3] = tbs
+        try:
+            buf.tofile(self._f)
+        except OSError:
+            self.close()   # disk full etc.; keep what was written
+            return
+        self.rows += n
+
+    def flush(self):
+        if self._f is not None:
+            self._f.flush()
+
+    def close(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+    @staticmethod
+    def read_blocks(path: str, rows: int, block_rows: int = 65536):
+        """Yield (time_ms, brake, throttle) arrays for the first rows rows of
+        a log, block_rows at a time, so a long log is never all in memory."""
+        with open(path, 'rb') as f:
+            while rows > 0:
+                n = min(rows, block_rows)
+                a = array('d')
+                a.fromfile(f, 3*n)
+                yield a[0::3], a[1::3], a[2::3]
+                rows -= n